@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+
+
+class Admission:
+    """Concurrency limiter whose capacity can be resized safely at runtime.
+
+    Unlike ``asyncio.Semaphore``, the cap is an ordinary counter guarded by a
+    ``Condition``, so it can be lowered under upstream pressure (429s) and
+    raised back without touching private semaphore state.
+    """
+
+    def __init__(self, cap: int) -> None:
+        self.cap = max(1, cap)
+        self.active = 0
+        self.cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait until a slot is free, then claim it."""
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.active < self.cap)
+            self.active += 1
+
+    async def release(self) -> None:
+        """Return a slot and wake one waiter."""
+        async with self.cond:
+            self.active -= 1
+            self.cond.notify(1)
+
+    async def set_cap(self, new_cap: int) -> None:
+        """Resize the cap; wakes all waiters if capacity increased."""
+        new_cap = max(1, new_cap)
+        async with self.cond:
+            raised = new_cap > self.cap
+            self.cap = new_cap
+            if raised:
+                self.cond.notify_all()
+
+    async def __aenter__(self) -> "Admission":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.release()
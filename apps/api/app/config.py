@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Literal
+from typing import Literal, Tuple
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -24,15 +25,21 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-    @property
+    @cached_property
     def max_file_size_bytes(self) -> int:
-        """Max file size in bytes."""
+        """Max file size in bytes, computed once."""
         return self.max_file_size_mb * 1024 * 1024
 
-    @property
-    def cors_origin_list(self) -> List[str]:
-        """CORS origins parsed into a list."""
-        return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
+    @cached_property
+    def cors_origin_list(self) -> Tuple[str, ...]:
+        """CORS origins parsed once into a tuple."""
+        return tuple(origin.strip() for origin in self.cors_origins.split(",") if origin.strip())
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings instance (overridable in tests via cache_clear)."""
+    return Settings()
+
+
+settings = get_settings()
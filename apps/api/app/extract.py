@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import re
 import string
-from typing import Any, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, List, Optional, Sequence, Tuple
 
 
 PREFERRED_TEXT_PATHS: Sequence[Tuple[str, ...]] = (
@@ -20,18 +21,41 @@ PREFERRED_MARKDOWN_PATHS: Sequence[Tuple[str, ...]] = (
 
 SKIP_KEYWORDS = ("base64", "image", "bbox", "coordinates", "polygon")
 
+_SKIP_RE = re.compile("|".join(SKIP_KEYWORDS), re.IGNORECASE)
+
+
+_MISS = object()
+
+
+def _make_accessor(path: Tuple[str, ...]):
+    """Compile a key path into a closure that walks it without re-reading the tuple."""
+    # Defaults bind hot names locally, skipping global/builtin lookups per hop.
+    def get(payload: Any, _path: Tuple[str, ...] = path, _type: Any = type, _dict: Any = dict, _miss: Any = _MISS) -> Any:
+        for key in _path:
+            if _type(payload) is not _dict:
+                return None
+            payload = payload.get(key, _miss)
+            if payload is _miss:
+                return None
+        return payload
+    return get
+
+
+_COMPILED_TEXT = tuple(_make_accessor(path) for path in PREFERRED_TEXT_PATHS)
+_COMPILED_MARKDOWN = tuple(_make_accessor(path) for path in PREFERRED_MARKDOWN_PATHS)
+
 
 def extract_text_and_markdown(payload: Any) -> tuple[str, str]:
     """Extract best-effort text and markdown strings from a model payload."""
-    markdown = _first_path_match(payload, PREFERRED_MARKDOWN_PATHS)
-    text = _first_path_match(payload, PREFERRED_TEXT_PATHS)
-
-    pages_text = _extract_pages(payload)
-    if not text and pages_text:
-        text = pages_text
+    markdown = _first_path_match(payload, _COMPILED_MARKDOWN)
+    text = _first_path_match(payload, _COMPILED_TEXT)
 
-    if not markdown and pages_text:
-        markdown = pages_text
+    if not text or not markdown:
+        pages_text = _extract_pages(payload)
+        if not text and pages_text:
+            text = pages_text
+        if not markdown and pages_text:
+            markdown = pages_text
 
     if not text:
         text = _fallback_collect_text(payload)
@@ -42,78 +66,89 @@ def extract_text_and_markdown(payload: Any) -> tuple[str, str]:
     return (text or "").strip(), (markdown or "").strip()
 
 
-def _first_path_match(payload: Any, paths: Sequence[Tuple[str, ...]]) -> Optional[str]:
-    """Return the first non-empty string found by walking known paths."""
-    for path in paths:
-        value = _get_path(payload, path)
+def _first_path_match(payload: Any, accessors: Sequence[Any]) -> Optional[str]:
+    """Return the first non-empty string found by the compiled accessors."""
+    for accessor in accessors:
+        value = accessor(payload)
         if isinstance(value, str) and value.strip():
             return value
     return None
 
 
-def _get_path(payload: Any, path: Tuple[str, ...]) -> Any:
-    """Traverse nested dicts by a sequence of keys."""
-    current = payload
-    for key in path:
-        if not isinstance(current, dict) or key not in current:
-            return None
-        current = current[key]
-    return current
-
-
 def _extract_pages(payload: Any) -> Optional[str]:
     """Concatenate page-level text/content/markdown fields if present."""
-    pages = None
-    if isinstance(payload, dict):
-        pages = payload.get("pages") or payload.get("document", {}).get("pages")
+    if type(payload) is not dict:
+        return None
+    pages = payload.get("pages")
+    if pages is None:
+        document = payload.get("document")
+        if type(document) is dict:
+            pages = document.get("pages")
 
-    if not isinstance(pages, list):
+    if type(pages) is not list:
         return None
 
     texts: List[str] = []
     for page in pages:
-        if not isinstance(page, dict):
+        if type(page) is not dict:
             continue
-        for key in ("text", "content", "markdown"):
-            value = page.get(key)
-            if isinstance(value, str) and value.strip():
-                texts.append(value.strip())
-                break
+        value = page.get("text") or page.get("content") or page.get("markdown")
+        if isinstance(value, str):
+            stripped = value.strip()
+            if stripped:
+                texts.append(stripped)
 
     return "\n\n".join(texts) if texts else None
 
 
+FALLBACK_MAX_CHARS = 1_000_000
+FALLBACK_MAX_DEPTH = 12
+
+
 def _fallback_collect_text(payload: Any) -> str:
-    """Collect all string leaves (minus base64/image/bbox-related keys)."""
-    strings = [s.strip() for s in _collect_strings(payload) if s.strip()]
+    """Collect string leaves (minus base64/image/bbox keys), bounded in size."""
+    strings: List[str] = []
+    _collect_strings(payload, strings)
     return "\n\n".join(strings)
 
 
-def _collect_strings(payload: Any, parent_key: str = "") -> Iterable[str]:
-    """Yield string leaves, skipping base64-like content and ignored keys."""
-    if isinstance(payload, dict):
-        for key, value in payload.items():
-            if _should_skip_key(key):
-                continue
-            yield from _collect_strings(value, key)
-    elif isinstance(payload, list):
-        for item in payload:
-            yield from _collect_strings(item, parent_key)
-    elif isinstance(payload, str):
-        if _looks_like_base64(payload):
-            return
-        yield payload
+def _collect_strings(payload: Any, out: List[str], _type: Any = type, _dict: Any = dict, _list: Any = list, _str: Any = str) -> None:
+    """Append stripped string leaves to out, skipping base64-like content and ignored keys."""
+    stack = [(payload, 0)]
+    collected = 0
+    while stack:
+        current, depth = stack.pop()
+        kind = _type(current)
+        if kind is _str:
+            stripped = current.strip()
+            if stripped and not _looks_like_base64(current):
+                out.append(stripped)
+                collected += len(stripped)
+                if collected >= FALLBACK_MAX_CHARS:
+                    return
+        elif kind is _dict:
+            if depth < FALLBACK_MAX_DEPTH:
+                child_depth = depth + 1
+                # Push in reverse so the LIFO stack preserves document order.
+                for key, value in reversed(current.items()):
+                    if not _should_skip_key(key):
+                        stack.append((value, child_depth))
+        elif kind is _list:
+            if depth < FALLBACK_MAX_DEPTH:
+                child_depth = depth + 1
+                for item in reversed(current):
+                    stack.append((item, child_depth))
 
 
 def _should_skip_key(key: str) -> bool:
     """Return True if a key suggests image/base64 or bbox fields we want to skip."""
-    lowered = key.lower()
-    return any(token in lowered for token in SKIP_KEYWORDS)
+    return _SKIP_RE.search(key) is not None
+
+
+# Deletes every base64-alphabet char; a pure-base64 string translates to "".
+_B64_BAD = str.maketrans("", "", string.ascii_letters + string.digits + "+/=\n")
 
 
 def _looks_like_base64(value: str) -> bool:
     """Heuristic to avoid emitting large base64 blobs as text."""
-    if len(value) < 200:
-        return False
-    allowed = set(string.ascii_letters + string.digits + "+/=\n")
-    return all(ch in allowed for ch in value)
+    return len(value) >= 200 and not value.translate(_B64_BAD)
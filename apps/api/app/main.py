@@ -1,12 +1,30 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
 from .ocr import process_uploads
 
-app = FastAPI(title="Doc AI OCR")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create one pooled HTTP client per process, reused across requests."""
+    app.state.http = httpx.AsyncClient(
+        timeout=settings.request_timeout_s,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
+app = FastAPI(title="Doc AI OCR", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,7 +42,7 @@ async def health() -> dict:
 
 
 @app.post("/api/ocr")
-async def ocr(files: list[UploadFile] = File(...)) -> dict:
+async def ocr(request: Request, files: list[UploadFile] = File(...)) -> dict:
     """Accept multiple files, forward to OCR, and return parsed results."""
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded.")
@@ -34,5 +52,5 @@ async def ocr(files: list[UploadFile] = File(...)) -> dict:
             detail=f"Max {settings.max_files} files allowed.",
         )
 
-    results = await process_uploads(files)
+    results = await process_uploads(files, request.app.state.http)
     return {"results": results, "count": len(results)}
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import asyncio
-import base64
-import mimetypes
 import random
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
 import httpx
+import orjson
+import pybase64
 from fastapi import UploadFile
 
+from .admission import Admission
 from .config import settings
 from .extract import extract_text_and_markdown
 
@@ -20,62 +22,99 @@ ALLOWED_MIME_TYPES = {
     "image/jpg": "image/jpeg",
 }
 
+_EXT_MAP = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
 RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
+# Encodes above this size run in a worker thread so the event loop stays free.
+_ENCODE_OFFLOAD_BYTES = 1024 * 1024
+
+# Settings are fixed for the process; bind the hot ones once at import so the
+# per-file path skips pydantic attribute lookups.
+_ENDPOINT = settings.azure_ocr_endpoint
+_MAX_FILE_SIZE = settings.max_file_size_bytes
+_MAX_CONCURRENCY = settings.max_concurrency
+
+# Shared across requests so 429-driven cap reductions persist between batches.
+_admission = Admission(_MAX_CONCURRENCY)
+
 
 def normalize_mime_type(content_type: Optional[str], filename: Optional[str]) -> Optional[str]:
     """Return a normalized MIME type if supported, otherwise None."""
-    if content_type:
-        base = content_type.split(";")[0].strip().lower()
-        if base in ALLOWED_MIME_TYPES:
-            return ALLOWED_MIME_TYPES[base]
+    ext = None
     if filename:
-        guessed, _ = mimetypes.guess_type(filename)
-        if guessed in ALLOWED_MIME_TYPES:
-            return ALLOWED_MIME_TYPES[guessed]
+        dot = filename.rfind(".")
+        if dot != -1:
+            ext = filename[dot:].lower()
+    return _normalize_cached(content_type, ext)
+
+
+@lru_cache(maxsize=64)
+def _normalize_cached(content_type: Optional[str], ext: Optional[str]) -> Optional[str]:
+    """Resolve a (content_type, extension) pair; the key space is tiny in practice."""
+    if content_type:
+        normalized = ALLOWED_MIME_TYPES.get(content_type.split(";")[0].strip().lower())
+        if normalized:
+            return normalized
+    if ext:
+        return _EXT_MAP.get(ext)
     return None
 
 
-def build_data_url(mime_type: str, data: bytes) -> str:
-    """Encode binary data as a base64 data URL."""
-    encoded = base64.b64encode(data).decode("ascii")
-    return f"data:{mime_type};base64,{encoded}"
+def build_data_url(mime_type: str, data: bytes) -> bytes:
+    """Encode binary data as a base64 data URL, kept as bytes to avoid copies."""
+    return b"data:" + mime_type.encode("ascii") + b";base64," + pybase64.b64encode(data)
 
 
-def build_payload(data_url: str, mime_type: str) -> Dict[str, Any]:
-    """Build the OCR request payload for PDF vs image inputs."""
-    is_pdf = mime_type == "application/pdf"
-    document_key = "document_url" if is_pdf else "image_url"
-    return {
-        "model": settings.mistral_model,
-        "document": {
-            "type": "document_url" if is_pdf else "image_url",
-            document_key: data_url,
-        },
-        "include_image_base64": False,
-    }
+def _payload_template(document_key: str) -> Tuple[bytes, bytes]:
+    """Pre-serialize everything around the data URL for one document type."""
+    key = document_key.encode("ascii")
+    prefix = (
+        b'{"model":' + orjson.dumps(settings.mistral_model)
+        + b',"document":{"type":"' + key + b'","' + key + b'":"'
+    )
+    suffix = b'"},"include_image_base64":false}'
+    return prefix, suffix
+
+
+_PDF_TEMPLATE = _payload_template("document_url")
+_IMAGE_TEMPLATE = _payload_template("image_url")
 
 
-async def process_uploads(files: List[UploadFile]) -> List[Dict[str, Any]]:
+def build_payload(data_url: bytes, mime_type: str) -> bytes:
+    """Serialize the OCR request payload for PDF vs image inputs.
+
+    The data URL is a fixed prefix plus base64, so JSON escaping is a no-op
+    and the payload is a plain bytes concat around a prebuilt template.
+    """
+    prefix, suffix = _PDF_TEMPLATE if mime_type == "application/pdf" else _IMAGE_TEMPLATE
+    return prefix + data_url + suffix
+
+
+async def process_uploads(files: List[UploadFile], client: httpx.AsyncClient) -> List[Dict[str, Any]]:
     """Process a list of uploads in parallel with bounded concurrency."""
-    semaphore = asyncio.Semaphore(settings.max_concurrency)
-    async with httpx.AsyncClient(timeout=settings.request_timeout_s) as client:
+    async with asyncio.TaskGroup() as group:
         tasks = [
-            _process_single(file, client, semaphore)
+            group.create_task(_process_single(file, client, _admission))
             for file in files
         ]
-        return await asyncio.gather(*tasks)
+    return [task.result() for task in tasks]
 
 
-async def _process_single(file: UploadFile, client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+async def _process_single(file: UploadFile, client: httpx.AsyncClient, admission: Admission) -> Dict[str, Any]:
     """Validate, encode, send one file to OCR, and parse the response."""
     result: Dict[str, Any] = {
         "id": uuid4().hex,
         "filename": file.filename or "unnamed",
     }
 
-    data = await file.read()
-    if len(data) > settings.max_file_size_bytes:
+    data = await _read_bounded(file, _MAX_FILE_SIZE)
+    if data is None:
         result["error"] = "File exceeds the 5MB limit."
         return result
 
@@ -84,11 +123,14 @@ async def _process_single(file: UploadFile, client: httpx.AsyncClient, semaphore
         result["error"] = "Unsupported file type."
         return result
 
-    data_url = build_data_url(mime_type, data)
+    if len(data) > _ENCODE_OFFLOAD_BYTES:
+        data_url = await asyncio.get_running_loop().run_in_executor(None, build_data_url, mime_type, data)
+    else:
+        data_url = build_data_url(mime_type, data)
     payload = build_payload(data_url, mime_type)
 
     try:
-        async with semaphore:
+        async with admission:
             response = await _post_with_backoff(client, payload)
     except httpx.HTTPStatusError as exc:
         status = exc.response.status_code
@@ -98,24 +140,47 @@ async def _process_single(file: UploadFile, client: httpx.AsyncClient, semaphore
         result["error"] = "OCR request failed."
         return result
 
-    text, markdown = extract_text_and_markdown(response)
+    text, markdown = await asyncio.get_running_loop().run_in_executor(
+        None, extract_text_and_markdown, response
+    )
     result["text"] = text
     result["markdown"] = markdown
     return result
 
 
-async def _post_with_backoff(client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+async def _read_bounded(file: UploadFile, limit: int, chunk_size: int = 65536) -> Optional[bytes]:
+    """Read an upload in chunks, returning None as soon as it exceeds the limit."""
+    if file.size is not None and file.size > limit:
+        return None
+
+    buf = bytearray()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        buf.extend(chunk)
+        if len(buf) > limit:
+            return None
+    return bytes(buf)
+
+
+async def _post_with_backoff(client: httpx.AsyncClient, payload: bytes) -> Dict[str, Any]:
     """POST to the OCR endpoint with retry/backoff on retryable statuses."""
-    headers = _build_headers()
+    headers = _HEADERS
 
     last_exc: Optional[Exception] = None
     for attempt in range(1, 5):
         try:
-            response = await client.post(settings.azure_ocr_endpoint, headers=headers, json=payload)
+            response = await client.post(_ENDPOINT, headers=headers, content=payload)
+            if response.status_code == 429:
+                # Azure is shedding load; shrink our concurrency cap too.
+                await _admission.set_cap(_admission.cap - 1)
             if response.status_code in RETRYABLE_STATUS:
                 raise httpx.HTTPStatusError("Retryable status", request=response.request, response=response)
             response.raise_for_status()
-            return response.json()
+            if _admission.cap < _MAX_CONCURRENCY:
+                await _admission.set_cap(_admission.cap + 1)
+            return orjson.loads(response.content)
         except (httpx.TimeoutException, httpx.HTTPStatusError) as exc:
             last_exc = exc
             if isinstance(exc, httpx.HTTPStatusError):
@@ -131,11 +196,12 @@ async def _post_with_backoff(client: httpx.AsyncClient, payload: Dict[str, Any])
     raise httpx.HTTPError("Request failed")
 
 
+_BACKOFF_BASE = tuple(0.7 * (2 ** i) for i in range(4))
+
+
 def _backoff_delay(attempt: int) -> float:
     """Compute exponential backoff with jitter."""
-    base = 0.7 * (2 ** (attempt - 1))
-    jitter = random.uniform(0, 0.4)
-    return min(base + jitter, 6.0)
+    return min(_BACKOFF_BASE[attempt - 1] + random.random() * 0.4, 6.0)
 
 
 def _build_headers() -> Dict[str, str]:
@@ -159,3 +225,13 @@ def _build_headers() -> Dict[str, str]:
         "Authorization": f"Bearer {key}",
         "api-key": key,
     }
+
+
+# Evaluated once at import; the auth style never changes mid-process.
+_HEADERS = _build_headers()
+
+
+def reset_headers() -> None:
+    """Re-evaluate the cached headers after a settings override (tests)."""
+    global _HEADERS
+    _HEADERS = _build_headers()